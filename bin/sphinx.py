@@ -35,22 +35,25 @@ parser.add_argument("--RelativePathPlots", type=bool, default=True, \
 
 
 
-args = parser.parse_args()
-model_list = args.ModelList
-data_list = args.DataList
-resume = args.resume
-df_pkl = args.DataFrame
-relative_path_plots = args.RelativePathPlots
+#Guard so that the worker processes used to read in the jsons
+#do not rerun validation on platforms that spawn new interpreters
+if __name__ == "__main__":
+    args = parser.parse_args()
+    model_list = args.ModelList
+    data_list = args.DataList
+    resume = args.resume
+    df_pkl = args.DataFrame
+    relative_path_plots = args.RelativePathPlots
 
-#report_only = args.ReportOnly
+    #report_only = args.ReportOnly
 
 
-#show_plot = args.showplot
-#PrintToScreen = args.PrintToScreen
-#write_report = args.WriteReport
-#SaveMetrics = args.SaveMetrics
-#onemodel = args.OneModel
+    #show_plot = args.showplot
+    #PrintToScreen = args.PrintToScreen
+    #write_report = args.WriteReport
+    #SaveMetrics = args.SaveMetrics
+    #onemodel = args.OneModel
 
 
-sphinxval.sphinx.validate(data_list, model_list, resume, df_pkl)
-sphinxval.sphinx.report.report(None, relative_path_plots)
+    sphinxval.sphinx.validate(data_list, model_list, resume, df_pkl)
+    sphinxval.sphinx.report.report(None, relative_path_plots)
@@ -7,7 +7,6 @@ from ..utils import match
 from ..utils import resume
 from ..utils import report
 import datetime
-import pickle
 import logging
 import sys
 import os
@@ -17,6 +17,22 @@ awt_cut = 96
 #after an event. Allow forecasts for up to a certain period of time
 #after an event starts.
 
+#JSON Ingestion
+json_nproc = 1
+#Number of processes used to read in the observation and forecast
+#jsons. json_nproc = 1 reads the files one at a time in the calling
+#process. Scripts that set json_nproc > 1 and call validate() must do
+#so under an if __name__ == "__main__": guard on platforms that spawn
+#new processes (macOS, Windows, notebooks).
+json_files_per_proc = 50
+#Minimum number of json files per process. Short lists are read in
+#the calling process rather than starting a process pool.
+
+#Observed Time Profiles
+time_profile_nthreads = 8
+#Number of threads used to read in observed flux time profile files
+#in post analysis.
+
 #Peak Flux
 peak_flux_cut = 8e-1
 #When comparing with peak flux values, if the observed
@@ -587,13 +587,13 @@ def plot_flux_false_alarms(obs_dates, obs_fluxes,
     #Threshold line
     plt.axhline(threshold, color="red", linestyle='--')
     
-    if fa_dates != []:
+    if len(fa_dates) > 0:
         ax.plot(fa_dates, fa_fluxes, "o", label=labels[3], color="red")
-    if miss_dates != []:
+    if len(miss_dates) > 0:
         ax.plot(miss_dates, miss_fluxes, "s", label=labels[4], color="blue")
-    if cn_dates != []:
+    if len(cn_dates) > 0:
         ax.plot(cn_dates, cn_fluxes, "P", label=labels[2], color="limegreen")
-    if hits_dates != []:
+    if len(hits_dates) > 0:
         ax.plot(hits_dates, hits_fluxes, "v", label=labels[1], color="darkorange")
 
     ax.set(xlabel=x_label, ylabel=y_label)
@@ -5,12 +5,15 @@
     the output pkl and csv
 '''
 import sys
-from . import plotting_tools as plt_tools
+import os
+import re
+import collections
+import itertools
+import concurrent.futures
 from . import time_profile as profile
 from . import resume
-import pickle
+import numpy as np
 import pandas as pd
-import matplotlib as plt
 from . import config as cfg
 
 #Columns to exclude from box plots - not used
@@ -18,11 +21,137 @@ exclude_box = ["N (Total Number of Forecasts)", "Predicted SEP Events",
         "Missed SEP Events", "Scatter Plot", "Linear Regression y-intercept",
         "ROC Curve Plot", "Spearman Correlation Coefficient (Log)"]
 
+#File prefix for various forecasted quantities
+file_prefixes = {"All Clear": "all_clear",
+        "Advanced Warning Time": "awt",
+        "Probability": "probability",
+        "Threshold Crossing Time": "threshold_crossing_time",
+        "Start Time": "start_time",
+        "End Time": "end_time",
+        "Onset Peak Time": "peak_intensity_time",
+        "Onset Peak": "peak_intensity",
+        "Max Flux Time": "peak_intensity_max_time",
+        "Max Flux": "peak_intensity_max",
+        "Max Flux in Prediction Window": "max_flux_in_pred_win",
+        "Duration": "duration",
+        "Fluence": "fluence",
+        "Time Profile": "time_profile"
+        }
+
+#Metrics that are plotted together in box plots
+#ALL CLEAR
+all_clear_groups = (("All Clear 'True Positives' (Hits)",
+            "All Clear 'False Positives' (False Alarms)",
+            "All Clear 'True Negatives' (Correct Negatives)",
+            "All Clear 'False Negatives' (Misses)"),
+            ("Percent Correct", "Bias", "Hit Rate", "False Alarm Rate",
+            "Frequency of Misses", "Frequency of Hits"),
+            ("Probability of Correct Negatives",
+            "Frequency of Correct Negatives", "False Alarm Ratio",
+            "Detection Failure Ratio", "Threat Score"),
+            ("Gilbert Skill Score", "True Skill Statistic",
+            "Heidke Skill Score", "Odds Ratio Skill Score",
+            "Symmetric Extreme Dependency Score"),
+            ("Number SEP Events Correctly Predicted",
+            "Number SEP Events Missed", "Odds Ratio")
+        )
+
+#PROBABILITY
+probability_groups = (("Brier Score", "Brier Skill Score",
+            "Spearman Correlation Coefficient", "Area Under ROC Curve"),
+        )
+
+#FLUX METRICS
+flux_groups = (("Linear Regression Slope",
+            "Pearson Correlation Coefficient (Linear)",
+            "Pearson Correlation Coefficient (Log)",
+            "Spearman Correlation Coefficient (Linear)"),
+            ("Mean Error (ME)", "Median Error (MedE)"),
+            ("Mean Absolute Error (MAE)",
+            "Median Absolute Error (MedAE)",
+            "Root Mean Square Error (RMSE)"),
+            ("Mean Log Error (MLE)", "Median Log Error (MedLE)"),
+            ("Mean Absolute Log Error (MALE)",
+            "Median Absolute Log Error (MedALE)",
+            "Root Mean Square Log Error (RMSLE)"),
+            ("Mean Percent Error (MPE)",
+            "Mean Symmetric Percent Error (MSPE)",
+            "Mean Symmetric Absolute Percent Error (SMAPE)"),
+            ("Mean Absolute Percent Error (MAPE)",
+            "Median Symmetric Accuracy (MdSA)",
+            "Mean Accuracy Ratio (MAR)")
+        )
+
+#Box plot groups by forecasted quantity. Time metrics and any
+#quantity not listed have no box plots.
+quantity_plot_groups = {"All Clear": all_clear_groups,
+        "Probability": probability_groups,
+        "Onset Peak": flux_groups,
+        "Max Flux": flux_groups,
+        "Fluence": flux_groups,
+        "Max Flux in Prediction Window": flux_groups,
+        "Time Profile": flux_groups
+        }
+
+#Background threads that write out the csv files of incorrect
+#forecasts while the observed fluxes are read in and plotted
+_csv_writer = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+#Contingency table outcome codes,
+#2*(observed SEP event) + (predicted SEP event)
+CORRECT_NEGATIVE = 0
+FALSE_ALARM = 1
+MISS = 2
+HIT = 3
+
+#Columns of the SPHINX dataframe needed to find the observed
+#time profiles for an energy channel and threshold
+flux_file_columns = ("Energy Channel Key", "Threshold Key",
+        "Observed Time Profile")
+
+#SPHINX dataframes already read in, keyed by filename and columns.
+#Each entry holds the file modification time and the dataframe so
+#that a rewritten file is read in again.
+_sphinx_df_cache = {}
+
+
+def read_sphinx_df(spx_fname, columns):
+    """ Read in the specified columns of the SPHINX_dataframe.pkl file,
+        reusing the dataframe from a previous call if the file has not
+        changed since.
+        
+        INPUT:
+        
+        :spx_fname: (string) SPHINX_dataframe.pkl filename
+        :columns: (tuple of strings) columns to read in
+        
+        OUTPUT:
+        
+        :sphinx_df: (pandas DataFrame) SPHINX dataframe. Shared
+            between calls, so should not be modified in place.
+        
+    """
+    try:
+        mtime = os.stat(spx_fname).st_mtime_ns
+    except OSError:
+        mtime = None
 
-def read_observed_flux_files(path, energy_key, thresh_key):
-    """ Read in all observed flux time profiles that were associated
-        with a forecast prediction window from the SPHINX_dataframe.pkl
-        file.
+    key = (spx_fname, tuple(columns))
+    if key in _sphinx_df_cache:
+        cached_mtime, sphinx_df = _sphinx_df_cache[key]
+        if mtime is not None and cached_mtime == mtime:
+            return sphinx_df
+
+    sphinx_df = resume.read_in_df_columns(spx_fname, columns)
+    sphinx_df = resume.to_categorical(sphinx_df)
+    _sphinx_df_cache[key] = (mtime, sphinx_df)
+    return sphinx_df
+
+
+def observed_time_profile_files(path, energy_key, thresh_key):
+    """ Find the unique observed flux time profile files that were
+        associated with a forecast prediction window in the
+        SPHINX_dataframe.pkl file.
         
         INPUT:
         
@@ -33,36 +162,183 @@ def read_observed_flux_files(path, energy_key, thresh_key):
             
         OUTPUT:
         
-        :dates: (1xn datetime array) dates
-        :fluxes: (1xn floar array) fluxes associated with dates
+        :tprof: (list of strings) time profile filenames
         
     """
-
     spx_fname = path + "output/pkl/SPHINX_dataframe.pkl"
-    sphinx_df = resume.read_in_df(spx_fname)
-    sphinx_df = sphinx_df[(sphinx_df["Energy Channel Key"] == energy_key) & (sphinx_df["Threshold Key"] == thresh_key)]
-    
-    
-    observations = sphinx_df['Observed Time Profile'].to_list()
+    sphinx_df = read_sphinx_df(spx_fname, flux_file_columns)
+    #Only the observed time profile filenames are needed, so select
+    #that single column for the matching rows rather than copying
+    #every column of the filtered dataframe
+    select = (sphinx_df["Energy Channel Key"] == energy_key) & (sphinx_df["Threshold Key"] == thresh_key)
+    observations = sphinx_df.loc[select, 'Observed Time Profile']
+
     #Create list of unique observed time profile filenames
-    #(may be repeates in the sphinx dataframe
-    tprof = []
-    for obsfile in observations:
-        obsfile = obsfile.strip().split(",")
-        for tp in obsfile:
-            if tp not in tprof:
-                tprof.append(tp)
+    #(may be repeates in the sphinx dataframe). Each entry may hold
+    #several comma separated filenames, so split them out into one
+    #row each and keep the first occurrence of every filename.
+    observations = observations.dropna()
+    observations = observations.str.split(",").explode().str.strip()
+    observations = observations[observations != ""]
+    tprof = pd.unique(observations).tolist()
+
+    return tprof
 
+
+def read_observed_flux_files_iter(path, energy_key, thresh_key):
+    """ Read in the observed flux time profiles that were associated
+        with a forecast prediction window, yielding the fluxes file by
+        file in order.
+        
+        Files are read in cfg.time_profile_nthreads threads. At most
+        that many files are read in ahead of the caller, so only
+        those files and the ones the caller keeps are held in memory.
+        
+        INPUT:
+        
+        :path: (string) path to the output directory with trailing /
+            (not including) output/
+        :energy_key: (string) energy channel key
+        :thresh_key: (string) threshold key
+            
+        OUTPUT:
+        
+        Yields for each time profile file:
+        
+        :dates: (1xn datetime64 array) dates
+        :fluxes: (1xn float32 array) fluxes associated with dates
+        
+    """
+    tprof = observed_time_profile_files(path, energy_key, thresh_key)
+    nthreads = cfg.time_profile_nthreads
+
+    #The time profile files are independent, so read several at the
+    #same time. The threads read quietly and progress is printed here
+    #so that messages are not interleaved.
+    files = iter(tprof)
+    pending = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=nthreads) as pool:
+        while True:
+            #Keep at most nthreads files read in ahead of the caller
+            for fnm in itertools.islice(files, nthreads - len(pending)):
+                pending.append((fnm, pool.submit(
+                    profile.read_single_time_profile, fnm, verbose=False)))
+            if len(pending) == 0:
+                break
+
+            fnm, future = pending.popleft()
+            dt, flx = future.result()
+            if len(dt) == 0:
+                print("read_observed_flux_files: No fluxes read in from "
+                    "file " + fnm)
+                continue
+            print("read_observed_flux_files: Read in file " + fnm)
+            yield np.asarray(dt, dtype='datetime64[s]'), \
+                np.asarray(flx, dtype=np.float32)
+
+
+def read_observed_flux_files(path, energy_key, thresh_key):
+    """ Read in all observed flux time profiles that were associated
+        with a forecast prediction window from the SPHINX_dataframe.pkl
+        file and join them into single arrays. Use
+        read_observed_flux_files_iter to handle one file at a time.
+        
+        INPUT:
+        
+        :path: (string) path to the output directory with trailing /
+            (not including) output/
+        :energy_key: (string) energy channel key
+        :thresh_key: (string) threshold key
+            
+        OUTPUT:
+        
+        :dates: (1xn datetime64 array) dates
+        :fluxes: (1xn float32 array) fluxes associated with dates
+        
+    """
     dates = []
     fluxes = []
-    for fnm in tprof:
-        dt, flx = profile.read_single_time_profile(fnm)
-        if dt == []:
-            continue
-        dates.extend(dt)
-        fluxes.extend(flx)
+    for dt, flx in read_observed_flux_files_iter(path, energy_key,
+        thresh_key):
+        dates.append(dt)
+        fluxes.append(flx)
+
+    if len(dates) == 0:
+        return np.array([], dtype='datetime64[s]'), \
+            np.array([], dtype=np.float32)
+
+    return np.concatenate(dates), np.concatenate(fluxes)
+
+
+def outcome_codes(obs_event, pred_event):
+    """ Combine observed and predicted SEP event flags into a single
+        contingency table outcome code for each forecast.
+        
+        INPUT:
+        
+        :obs_event: (float array) 1 if an SEP event was observed,
+            0 if not, NaN if undefined
+        :pred_event: (float array) 1 if an SEP event was predicted,
+            0 if not, NaN if undefined
+            
+        OUTPUT:
+        
+        :codes: (int array) CORRECT_NEGATIVE, FALSE_ALARM, MISS or HIT
+            for each forecast, -1 where either flag is undefined
+        
+    """
+    codes = 2.*np.asarray(obs_event, dtype=float) \
+        + np.asarray(pred_event, dtype=float)
+    codes[np.isnan(codes)] = -1
+    return codes.astype(np.int8)
 
-    return dates, fluxes
+
+def threshold_outcome_codes(obs, pred, threshold):
+    """ Contingency table outcome code for each forecast from
+        observed and predicted fluxes compared to a threshold.
+        An SEP event is a flux at or above threshold.
+        
+        INPUT:
+        
+        :obs: (float array) observed fluxes
+        :pred: (float array) predicted fluxes
+        :threshold: (float) flux threshold
+            
+        OUTPUT:
+        
+        :codes: (int array) CORRECT_NEGATIVE, FALSE_ALARM, MISS or HIT
+            for each forecast, -1 where either flux is NaN
+        
+    """
+    obs = np.asarray(obs, dtype=float)
+    pred = np.asarray(pred, dtype=float)
+
+    codes = (obs >= threshold).astype(np.int8)
+    codes <<= 1
+    codes |= (pred >= threshold)
+    codes[np.isnan(obs) | np.isnan(pred)] = -1
+    return codes
+
+
+def split_outcomes(df, codes):
+    """ Split df into one dataframe per contingency table outcome.
+    
+        INPUT:
+        
+        :df: (pandas DataFrame) forecasts
+        :codes: (int array) outcome code for each row of df as
+            returned by outcome_codes or threshold_outcome_codes
+            
+        OUTPUT:
+        
+        :outcomes: (dict) dataframe for each of CORRECT_NEGATIVE,
+            FALSE_ALARM, MISS and HIT
+        
+    """
+    outcomes = {}
+    for code in (CORRECT_NEGATIVE, FALSE_ALARM, MISS, HIT):
+        outcomes[code] = df.iloc[np.flatnonzero(codes == code)]
+    return outcomes
 
 
 def export_all_clear_incorrect(filename, threshold, doplot=False):
@@ -97,66 +373,78 @@ def export_all_clear_incorrect(filename, threshold, doplot=False):
     energy_key = df["Energy Channel Key"].iloc[0]
     thresh_key = df["Threshold Key"].iloc[0]
 
+    #Sort all forecasts into contingency table outcomes in one pass.
+    #All Clear True means no SEP event. Anything other than True or
+    #False (e.g. None) is left undefined and not placed in any outcome.
+    all_clear_to_event = {True: 0., False: 1.}
+    obs_event = df["Observed SEP All Clear"].map(all_clear_to_event)
+    pred_event = df["Predicted SEP All Clear"].map(all_clear_to_event)
+    outcomes = split_outcomes(df, outcome_codes(obs_event, pred_event))
+    writes = []
+
     #Correct Predictions
     cn_dates = []
     cn_fluxes = []
-    sub = df.loc[(df["Observed SEP All Clear"] == True) & (df["Predicted SEP All Clear"] == True)]
+    sub = outcomes[CORRECT_NEGATIVE]
     if sub.empty:
         print("post_analysis: export_all_clear_incorrect: No correct negatives identified.")
     else:
-        cn_dates = sub["Prediction Window Start"].to_list()
-        cn_fluxes = [threshold]*len(cn_dates)
+        cn_dates = sub["Prediction Window Start"].to_numpy(copy=False)
+        cn_fluxes = np.full(len(cn_dates), threshold)
 
     #Hits
     hits_dates = []
     hits_fluxes = []
-    sub = df.loc[(df["Observed SEP All Clear"] == False) & (df["Predicted SEP All Clear"] == False)]
+    sub = outcomes[HIT]
     if sub.empty:
         print("post_analysis: export_all_clear_incorrect: No hits.")
     else:
-        hits_dates = sub["Prediction Window Start"].to_list()
-        hits_fluxes = [threshold]*len(hits_dates)
+        hits_dates = sub["Prediction Window Start"].to_numpy(copy=False)
+        hits_fluxes = np.full(len(hits_dates), threshold)
 
 
 
     #False Alarms
     fa_dates = []
     fa_fluxes = []
-    fa_sub = df.loc[(df["Observed SEP All Clear"] == True) & (df["Predicted SEP All Clear"] == False)]
+    fa_sub = outcomes[FALSE_ALARM]
     
     if fa_sub.empty:
         print("post_analysis: export_all_clear_incorrect: No false alarms identified.")
     else:
-        fa_dates = fa_sub["Prediction Window Start"].to_list()
-        fa_fluxes = [threshold+2]*len(fa_dates)
+        fa_dates = fa_sub["Prediction Window Start"].to_numpy(copy=False)
+        fa_fluxes = np.full(len(fa_dates), threshold+2)
 
         fname = filename.replace(".pkl","_false_alarms.csv")
         fname = fname.replace("pkl","csv")
         
         #Write false alarms out to csv file
-        fa_sub.to_csv(fname)
+        writes.append(_csv_writer.submit(fa_sub.to_csv, fname))
 
 
     #Misses
     miss_dates = []
     miss_fluxes = []
-    miss_sub = df.loc[(df["Observed SEP All Clear"] == False) & (df["Predicted SEP All Clear"] == True)]
+    miss_sub = outcomes[MISS]
     
     if miss_sub.empty:
         print("post_analysis: export_all_clear_incorrect: No misses identified.")
     else:
-        miss_dates = miss_sub["Prediction Window Start"].to_list()
-        miss_fluxes = [threshold-2]*len(miss_dates)
+        miss_dates = miss_sub["Prediction Window Start"].to_numpy(copy=False)
+        miss_fluxes = np.full(len(miss_dates), threshold-2)
 
         fname = filename.replace(".pkl","_misses.csv")
         fname = fname.replace("pkl","csv")
         
         #Write false alarms out to csv file
-        miss_sub.to_csv(fname)
+        writes.append(_csv_writer.submit(miss_sub.to_csv, fname))
 
 
 
     if doplot:
+        #Plotting tools pull in matplotlib, so only import when plotting
+        from . import plotting_tools as plt_tools
+
         #Read in observed time profiles to plot with the forecasts
         path = filename.strip().split("output")[0]
         obs_dates, obs_fluxes = read_observed_flux_files(path, energy_key, thresh_key)
@@ -180,6 +468,10 @@ def export_all_clear_incorrect(filename, threshold, doplot=False):
             miss_dates, miss_fluxes, labels, threshold,
             x_label="Date", y_label="", date_format="Year", title=title,
             figname=figname, saveplot=True, showplot=True)
+
+    #Wait for the csv files to be written out
+    for write in writes:
+        write.result()
         
 
 
@@ -228,70 +520,81 @@ def export_max_flux_incorrect(filename, threshold, doplot=False):
             pred_col = col
             print("Predicted column is " + pred_col)
     
+    #Sort all forecasts into contingency table outcomes in one pass.
+    #Missing observed or predicted fluxes are left undefined and not
+    #placed in any outcome.
+    obs = df["Observed Max Flux in Prediction Window"].to_numpy(dtype=float)
+    pred = df[pred_col].to_numpy(dtype=float)
+    outcomes = split_outcomes(df, threshold_outcome_codes(obs, pred,
+        threshold))
+    writes = []
 
     #Correct Predictions
     cn_dates = []
     cn_fluxes = []
     #Correct negatives
-    sub = df[(df["Observed Max Flux in Prediction Window"] < threshold) & (df[pred_col] < threshold)]
+    sub = outcomes[CORRECT_NEGATIVE]
     
     if sub.empty:
         print("post_analysis: export_max_flux_incorrect: No correct negatives identified.")
     else:
-        cn_dates = sub["Prediction Window Start"].to_list()
-        cn_fluxes = sub[pred_col].to_list()
+        cn_dates = sub["Prediction Window Start"].to_numpy(copy=False)
+        cn_fluxes = sub[pred_col].to_numpy(copy=False)
 
 
     #Hits
     hits_dates = []
     hits_fluxes = []
-    sub = df[(df["Observed Max Flux in Prediction Window"] >= threshold) & (df[pred_col] >= threshold)]
+    sub = outcomes[HIT]
     
     if sub.empty:
         print("post_analysis: export_max_flux_incorrect: No hits identified.")
     else:
-        hits_dates= sub["Prediction Window Start"].to_list()
-        hits_fluxes = sub[pred_col].to_list()
+        hits_dates= sub["Prediction Window Start"].to_numpy(copy=False)
+        hits_fluxes = sub[pred_col].to_numpy(copy=False)
 
 
     #False Alarms
     fa_dates = []
     fa_fluxes = []
-    fa_sub = df[(df["Observed Max Flux in Prediction Window"] < threshold) & (df[pred_col] >= threshold)]
+    fa_sub = outcomes[FALSE_ALARM]
     
     if fa_sub.empty:
         print("post_analysis: export_max_flux_incorrect: No false alarms identified.")
     else:
-        fa_dates = fa_sub["Prediction Window Start"].to_list()
-        fa_fluxes = fa_sub[pred_col].to_list()
+        fa_dates = fa_sub["Prediction Window Start"].to_numpy(copy=False)
+        fa_fluxes = fa_sub[pred_col].to_numpy(copy=False)
         
         fafname = filename.replace(".pkl","_false_alarms.csv")
         fafname = fafname.replace("pkl","csv")
         
         #Write false alarms out to csv file
-        fa_sub.to_csv(fafname)
+        writes.append(_csv_writer.submit(fa_sub.to_csv, fafname))
     
     
     #Misses
     miss_dates = []
     miss_fluxes = []
-    miss_sub = df[(df["Observed Max Flux in Prediction Window"] >= threshold) & (df[pred_col] < threshold)]
+    miss_sub = outcomes[MISS]
  
     if miss_sub.empty:
         print("post_analysis: export_max_flux_incorrect: No misses identified.")
     else:
-        miss_dates = miss_sub["Prediction Window Start"].to_list()
-        miss_fluxes = miss_sub[pred_col].to_list()
+        miss_dates = miss_sub["Prediction Window Start"].to_numpy(copy=False)
+        miss_fluxes = miss_sub[pred_col].to_numpy(copy=False)
         
         mfname = filename.replace(".pkl","_misses.csv")
         mfname = mfname.replace("pkl","csv")
 
         #Write misses out to csv file
-        miss_sub.to_csv(mfname)
+        writes.append(_csv_writer.submit(miss_sub.to_csv, mfname))
 
 
 
     if doplot:
+        #Plotting tools pull in matplotlib, so only import when plotting
+        from . import plotting_tools as plt_tools
+
         figname = filename.replace(".pkl","_Outcomes.png")
         figname = figname.replace("pkl","plots")
                 
@@ -318,6 +621,10 @@ def export_max_flux_incorrect(filename, threshold, doplot=False):
             miss_dates, miss_fluxes, labels, threshold,
             x_label="Date", y_label="", date_format="Year", title=title,
             figname=figname, saveplot=True, showplot=True)
+
+    #Wait for the csv files to be written out
+    for write in writes:
+        write.result()
         
 
 
@@ -326,27 +633,11 @@ def get_file_prefix(quantity):
     """ File prefix for various forecasted quantities.
     
     """
-    dict = {"All Clear": "all_clear",
-            "Advanced Warning Time": "awt",
-            "Probability": "probability",
-            "Threshold Crossing Time": "threshold_crossing_time",
-            "Start Time": "start_time",
-            "End Time": "end_time",
-            "Onset Peak Time": "peak_intensity_time",
-            "Onset Peak": "peak_intensity",
-            "Max Flux Time": "peak_intensity_max_time",
-            "Max Flux": "peak_intensity_max",
-            "Max Flux in Prediction Window": "max_flux_in_pred_win",
-            "Duration": "duration",
-            "Fluence": "fluence",
-            "Time Profile": "time_profile"
-            }
-
-    if quantity not in dict.keys():
+    if quantity not in file_prefixes:
         sys.exit("post_analysis: " + quantity + "not valid. Choose one "
-            + str(dict.keys()))
+            + str(file_prefixes.keys()))
 
-    return dict[quantity]
+    return file_prefixes[quantity]
     
 
 
@@ -371,6 +662,7 @@ def read_in_metrics(path, quantity, include, exclude):
     print("read_in_metrics: Reading in " + fname)
     
     df = resume.read_in_df(fname)
+    df = resume.to_categorical(df)
     
     #This is a little tricky because a part of a model
     #short_name might be in include. For example, to
@@ -389,26 +681,33 @@ def read_in_metrics(path, quantity, include, exclude):
             if not included:
                 exclude.append(model)
 
-    #Remove model results that should be excluded from the plots
+    #Remove model results that should be excluded from the plots.
+    #Excluded names are grouped by the included models that protect
+    #them (an included model that contains the excluded substring) and
+    #each group is searched for with one regular expression.
+    #Protection only applies to the excluded names it contains.
+    exclude_groups = {}
     for model in exclude:
-        if model != '':
-            model = model.replace('+','\+')
-            model = model.replace('(','\(')
-            model = model.replace(')','\)')
-            
-            #Avoid removing an included model that contains an excluded
-            #substring
-            included_model = ''
-            for incl_model in include:
-                if model in incl_model:
-                    included_model = incl_model
-            
-            if included_model != '':
-                df = df[(~df['Model'].str.contains(model) | df['Model'].str.contains(included_model))]
-            else:
-                df = df[~df['Model'].str.contains(model)]
+        if model == '': continue
+        protected = tuple(incl_model for incl_model in include
+            if model in incl_model)
+        exclude_groups.setdefault(protected, []).append(model)
+
+    remove = pd.Series(False, index=df.index)
+    for protected, excluded in exclude_groups.items():
+        excl_pattern = re.compile("|".join(re.escape(model)
+            for model in excluded))
+        matched = df['Model'].str.contains(excl_pattern, na=False)
+        if len(protected) > 0:
+            incl_pattern = re.compile("|".join(re.escape(model)
+                for model in protected))
+            matched &= ~df['Model'].str.contains(incl_pattern, na=False)
+        remove |= matched
+        for model in excluded:
             print("read_in_metrics: Removed model metrics for " + model)
 
+    df = df[~remove]
+
     return df
 
 
@@ -422,65 +721,11 @@ def plot_groups(quantity):
             
         OUTPUT:
         
-            :groups: (arr of strings) arrays containing metric names to be
+            :groups: (tuple of tuples of strings) metric names to be
                 be plotted together
                 
     """
-    #ALL CLEAR
-    if quantity == "All Clear":
-        groups = [  ["All Clear 'True Positives' (Hits)",
-                    "All Clear 'False Positives' (False Alarms)",
-                    "All Clear 'True Negatives' (Correct Negatives)",
-                    "All Clear 'False Negatives' (Misses)"],
-                    ["Percent Correct", "Bias", "Hit Rate", "False Alarm Rate",
-                    "Frequency of Misses", "Frequency of Hits"],
-                    ["Probability of Correct Negatives",
-                    "Frequency of Correct Negatives", "False Alarm Ratio",
-                    "Detection Failure Ratio", "Threat Score"],
-                    ["Gilbert Skill Score", "True Skill Statistic",
-                    "Heidke Skill Score", "Odds Ratio Skill Score",
-                    "Symmetric Extreme Dependency Score"],
-                    ["Number SEP Events Correctly Predicted",
-                    "Number SEP Events Missed", "Odds Ratio"]
-                ]
-
-    #PROBABILITY
-    if quantity == "Probability":
-        groups = [ ["Brier Score", "Brier Skill Score",
-                    "Spearman Correlation Coefficient", "Area Under ROC Curve"]
-                ]
-
-    #FLUX METRICS
-    flux_types = ["Onset Peak", "Max Flux", "Fluence",
-                "Max Flux in Prediction Window", "Time Profile"]
-    if quantity in flux_types:
-        groups = [ ["Linear Regression Slope",
-                    "Pearson Correlation Coefficient (Linear)",
-                    "Pearson Correlation Coefficient (Log)",
-                    "Spearman Correlation Coefficient (Linear)"],
-                    ["Mean Error (ME)", "Median Error (MedE)"],
-                    ["Mean Absolute Error (MAE)",
-                    "Median Absolute Error (MedAE)",
-                    "Root Mean Square Error (RMSE)"],
-                    ["Mean Log Error (MLE)", "Median Log Error (MedLE)"],
-                    ["Mean Absolute Log Error (MALE)",
-                    "Median Absolute Log Error (MedALE)",
-                    "Root Mean Square Log Error (RMSLE)"],
-                    ["Mean Percent Error (MPE)",
-                    "Mean Symmetric Percent Error (MSPE)",
-                    "Mean Symmetric Absolute Percent Error (SMAPE)"],
-                    ["Mean Absolute Percent Error (MAPE)",
-                    "Median Symmetric Accuracy (MdSA)",
-                    "Mean Accuracy Ratio (MAR)"]
-                ]
-
-    #TIME METRICS
-    time_types = ["Threshold Crossing Time", "Start Time", "End Time",
-                "Onset Peak Time", "Max Flux Time"]
-    if quantity in time_types:
-        groups = []
-
-    return groups
+    return quantity_plot_groups.get(quantity, ())
 
 
 
@@ -511,81 +756,74 @@ def make_box_plots(df, path, quantity, anonymous, highlight, saveplot,
     
     """
 
-    energy_channels = resume.identify_unique(df,'Energy Channel')
-    thresholds = resume.identify_thresholds_per_energy_channel(df,
-            ek_name='Energy Channel', tk_name='Threshold')
+    from . import plotting_tools as plt_tools
 
     groups = plot_groups(quantity)
 
     #Make plots according to energy channel and threshold combinations
-    for ek in energy_channels:
-        thresh = thresholds[ek]
-        for tk in thresh:
-            print(ek + ", " + tk)
-            sub = df.loc[(df['Energy Channel'] == ek) &
-                    (df['Threshold'] == tk)]
-
+    for (ek, tk), sub in df.groupby(['Energy Channel', 'Threshold'],
+            sort=False, observed=True):
+        print(ek + ", " + tk)
+
+        #Model labels are the same for every metric and group, so
+        #build them once for this energy channel and threshold
+        model_list = sub['Model'].to_list()
+        
+        nfcasts = []
+        if 'N (Total Number of Forecasts)' in sub.columns.to_list():
+            nfcasts = sub['N (Total Number of Forecasts)'].to_list()
+                            
+        if anonymous and highlight == '':
+            for j in range(len(model_list)):
+                model_list[j] = "Model " + str(j)
+
+        for jj in range(len(nfcasts)):
+            model_list[jj] += " (" + str(nfcasts[jj]) + ")"
+
+        in_list = True
+        if highlight != '':
+            in_list = False
+            for j in range(len(model_list)):
+                if highlight in model_list[j]:
+                    in_list = True
+                    continue
+                else:
+                    model_list[j] = "Models"
+        
+        grp = 0
+        for group in groups:
+            grp += 1
+            values = []
+            metric_names = []
+            model_names = []
+            hghlt = ''
+            for metric_col in group:
+                vals = sub[metric_col].to_numpy(dtype=float)
+                if metric_col in cfg.in_percent:
+                    vals = vals*100.
+                
+                if in_list:
+                    values.append(vals)
+                    metric_names.extend([metric_col]*len(vals))
+                    model_names.extend(model_list)
+ 
+            if len(values) > 0:
+                values = np.concatenate(values)
             
+            dict = {"Metrics": metric_names, "Models":model_names,
+                    "Values":values}
+            metrics_df = pd.DataFrame(dict)
             
-            grp = 0
-            for group in groups:
-                grp += 1
-                values = []
-                metric_names = []
-                model_names = []
-                hghlt = ''
-                for metric_col in group:
-                    vals = sub[metric_col].to_list()
-                    if metric_col in cfg.in_percent:
-                        vals = [x*100. for x in vals]
-                    model_list = sub['Model'].to_list()
-                    
-                    nfcasts = []
-                    if 'N (Total Number of Forecasts)' in sub.columns.to_list():
-                        nfcasts = sub['N (Total Number of Forecasts)'].to_list()
-                                        
-                    if anonymous and highlight == '':
-                        for j in range(len(model_list)):
-                            model_list[j] = "Model " + str(j)
-
-                    for jj in range(len(nfcasts)):
-                        model_list[jj] += " (" + str(nfcasts[jj]) + ")"
-
-                    if highlight != '':
-                        in_list = False
-                        for j in range(len(model_list)):
-                            if highlight in model_list[j]:
-                                in_list = True
-                                continue
-                            else:
-                                model_list[j] = "Models"
-                    
-                    if highlight == '':
-                        values.extend(vals)
-                        metric_names.extend([metric_col]*len(vals))
-                        model_names.extend(model_list)
- 
-                    
-                    if highlight != '' and in_list:
-                        values.extend(vals)
-                        metric_names.extend([metric_col]*len(vals))
-                        model_names.extend(model_list)
- 
-                
-                dict = {"Metrics": metric_names, "Models":model_names,
-                        "Values":values}
-                metrics_df = pd.DataFrame(dict)
-                
-          
-                title = quantity + " Group " + str(grp) + " (" + ek + ", " + tk + ")"
-                figname = path + "/summary/" + quantity + "_" + ek  \
-                        + "_boxes_Group" + str(grp)
-                if highlight != '':
-                    figname += "_" + highlight
-                if anonymous:
-                    figname += "_anon"
-                plt_tools.box_plot_metrics(metrics_df, group, highlight,
-                    x_label="Metric", y_label="Value", title=title,
-                    save=figname, uselog=False, showplot=showplot, \
-                    closeplot=False, saveplot=saveplot)
+      
+            title = quantity + " Group " + str(grp) + " (" + ek + ", " + tk + ")"
+            figname = path + "/summary/" + quantity + "_" + ek  \
+                    + "_boxes_Group" + str(grp)
+            if highlight != '':
+                figname += "_" + highlight
+            if anonymous:
+                figname += "_anon"
+            plt_tools.box_plot_metrics(metrics_df, group, highlight,
+                x_label="Metric", y_label="Value", title=title,
+                save=figname, uselog=False, showplot=showplot, \
+                closeplot=False, saveplot=saveplot)
 
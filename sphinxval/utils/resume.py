@@ -19,8 +19,8 @@ def read_in_df(filename):
     
     """
     try:
-        pklfile = open(filename,"rb")
-        df = pickle.load(pklfile)
+        with open(filename,"rb") as pklfile:
+            df = pickle.load(pklfile)
         return df
     except:
         sys.exit("validate: Cannot open pickle file containing "
@@ -28,6 +28,49 @@ def read_in_df(filename):
 
 
 
+def read_in_df_columns(filename, columns):
+    """ Read in pickle file containing SPHINX dataframe and keep
+        only the specified columns.
+        
+        INPUT:
+            :filename: (string) pickle file
+            :columns: (list of strings) columns to keep
+    
+        OUTPUT:
+            :df: (pandas DataFrame) dataframe with only columns
+        
+    """
+    df = read_in_df(filename)
+    return df[list(columns)]
+
+
+
+#Columns that hold a small set of labels repeated over many rows
+categorical_columns = ('Model', 'Energy Channel Key', 'Threshold Key',
+        'Energy Channel', 'Threshold')
+
+
+def to_categorical(df, columns=categorical_columns):
+    """ Convert the label columns of df to categorical dtype so
+        that comparisons and grouping work on integer codes
+        instead of strings. Columns not in df are skipped.
+        
+        INPUT:
+            :df: (pandas DataFrame) SPHINX or metrics dataframe
+            :columns: (list of strings) columns to convert
+    
+        OUTPUT:
+            :df: (pandas DataFrame) copy of df with categorical columns
+        
+    """
+    dtypes = {}
+    for col in columns:
+        if col in df.columns:
+            dtypes.update({col: 'category'})
+
+    return df.astype(dtypes)
+
+
 
 def identify_unique(df, value):
     """ Find all unique values in df and output list.
@@ -41,22 +84,11 @@ def identify_unique(df, value):
             :unique: (list) list of unique values
         
     """
-    unique = []
-    lst = df[value].to_list()
-    
     #First remove all None and pd.NaT values
-    for i in range(len(lst)-1,-1,-1):
-        if pd.isnull(lst[i]):
-            lst.pop(i)
-            continue
-        if lst[i] == None:
-            lst.pop(i)
-            continue
+    lst = [x for x in df[value].to_list() if not pd.isnull(x)]
     
-    while len(lst) > 0:
-        val = lst[0]
-        unique.append(val)
-        lst = [x for x in lst if x != val]
+    #Keep the first occurrence of each value, in order
+    unique = list(dict.fromkeys(lst))
     
     return unique
 
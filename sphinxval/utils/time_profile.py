@@ -77,21 +77,26 @@ def read_generic_time_profile(filename):
     return dates, profiles
 
 
-def read_single_time_profile(filename):
+def read_single_time_profile(filename, verbose=True):
     ''' Reads the flux time profile files generated by
         operational_sep_quantities.py for the CCMC SEP
         Scoreboard.
 
         The time profiles have zulu time in the first column
         and the flux time profile in the second column.
+        
+        Set verbose=False to not print progress messages, e.g. when
+        reading files in several threads at once.
     '''
     dates = []
     fluxes = []
     if not os.path.exists(filename):
-        print("read_time_profile: Cannot read file!! Exiting. \"" + filename +"\"")
+        if verbose:
+            print("read_time_profile: Cannot read file!! Exiting. \"" + filename +"\"")
         return dates, fluxes
 
-    print('read_single_time_profile: Reading in file ' + filename)
+    if verbose:
+        print('read_single_time_profile: Reading in file ' + filename)
     with open(filename) as ofile:
         for row in ofile:
             if row == '': continue
@@ -2,6 +2,10 @@ from . import classes as cl
 from . import object_handler as objh
 from . import config as cfg
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import calendar
 import datetime
 from datetime import timedelta
@@ -9,6 +13,7 @@ import zulu
 from . import units_handler as vunits #validation units
 import os
 import sys
+import concurrent.futures
 
 __version__ = "0.1"
 __author__ = "Katie Whitman"
@@ -32,9 +37,21 @@ __email__ = "kathryn.whitman@nasa.gov"
 """
 
 def read_in_json(filename):
-    """Read in json file """
-    with open(filename) as f:
-        info = json.load(f)
+    """Read in json file. Uses orjson if it is installed, falling
+       back to the json module for files that orjson rejects, e.g.
+       files containing NaN or Infinity.
+    """
+    if orjson is None:
+        with open(filename) as f:
+            info = json.load(f)
+        return info
+
+    with open(filename, "rb") as f:
+        raw = f.read()
+    try:
+        info = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        info = json.loads(raw)
     return info
 
 def make_ccmc_zulu_time(dt):
@@ -172,12 +189,27 @@ def read_list_of_jsons(filename):
             json_files.append(json_fname)
     return json_files
 
-def read_json_list(json_files, verbose=True):
+def read_json_list(json_files, verbose=True, nproc=None):
     """Read all of the json files in to a list containing each json entry.
+       If nproc (default cfg.json_nproc) is more than 1, the files are
+       parsed in up to nproc worker processes, with at least
+       cfg.json_files_per_proc files each. Entries are kept in the same
+       order as json_files.
     """
+    if nproc is None:
+        nproc = cfg.json_nproc
+    nproc = min(nproc, len(json_files)//cfg.json_files_per_proc)
+
+    if nproc > 1:
+        chunksize = max(1, len(json_files)//(4*nproc))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=nproc) as pool:
+            json_infos = list(pool.map(read_in_json, json_files,
+                chunksize=chunksize))
+    else:
+        json_infos = map(read_in_json, json_files)
+
     all_json = []
-    for json_fname in json_files:
-        json_info = read_in_json(json_fname)
+    for json_fname, json_info in zip(json_files, json_infos):
         if json_info == {}:
             continue
         if verbose: